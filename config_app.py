@@ -1,7 +1,57 @@
+import json
+import os
+import socket
+import threading
 import tkinter as tk
+from concurrent.futures import ThreadPoolExecutor
 from tkinter import ttk
 import cv2
-from PIL import Image, ImageTk
+import numpy as np
+
+CAMERA_CACHE_PATH = os.path.join(os.path.expanduser("~"), ".cache", "camera_viewer", "indices.json")
+# DirectShow and MSMF misbehave with many devices opening at once, so only a
+# few indices are probed at a time
+PROBE_WORKERS = 4
+
+try:
+    USE_CUDA = cv2.cuda.getCudaEnabledDeviceCount() > 0
+except (AttributeError, cv2.error):
+    USE_CUDA = False
+
+
+def probe_camera(idx):
+    cap = cv2.VideoCapture(idx)
+    try:
+        return idx if cap.isOpened() else None
+    finally:
+        cap.release()
+
+
+def load_cached_indices():
+    try:
+        with open(CAMERA_CACHE_PATH, "r", encoding="utf-8") as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        return []
+    indices = cache.get(socket.gethostname(), []) if isinstance(cache, dict) else []
+    return [idx for idx in indices if isinstance(idx, int)]
+
+
+def save_cached_indices(indices):
+    try:
+        with open(CAMERA_CACHE_PATH, "r", encoding="utf-8") as f:
+            cache = json.load(f)
+        if not isinstance(cache, dict):
+            cache = {}
+    except (OSError, ValueError):
+        cache = {}
+    cache[socket.gethostname()] = list(indices)
+    try:
+        os.makedirs(os.path.dirname(CAMERA_CACHE_PATH), exist_ok=True)
+        with open(CAMERA_CACHE_PATH, "w", encoding="utf-8") as f:
+            json.dump(cache, f)
+    except OSError:
+        pass
 
 
 class CameraViewerApp:
@@ -11,6 +61,15 @@ class CameraViewerApp:
         self.root.state("zoomed")
         self.caps = []
         self.panels = []
+        self.latest_frames = []
+        self.photos = []
+        self.preview_buffers = []
+        self.frame_lock = threading.Lock()
+        self.stop_event = threading.Event()
+        self.grab_threads = []
+        self.camera_slots = 0
+        # indices found by the background rescan, added on the Tk thread
+        self.discovered = []
 
         self.build_ui()
         self.open_cameras()
@@ -21,56 +80,152 @@ class CameraViewerApp:
         self.container.pack(fill="both", expand=True)
 
     def enumerate_cameras(self, max_index=16):
-        available = []
-        for idx in range(max_index):
-            cap = cv2.VideoCapture(idx)
-            if cap.isOpened():
-                available.append(idx)
-            cap.release()
+        # try the indices found on the last run first; only fall back to
+        # probing the full range when one of them no longer opens
+        cached = load_cached_indices()
+        if cached:
+            with ThreadPoolExecutor(max_workers=min(PROBE_WORKERS, len(cached))) as executor:
+                if all(idx is not None for idx in executor.map(probe_camera, cached)):
+                    # cameras plugged in since the last run are picked up
+                    # by probing the remaining indices in the background
+                    threading.Thread(target=self.rescan_cameras, args=(cached, max_index), daemon=True).start()
+                    return cached
+
+        # each open blocks on the driver, so probe a few indices concurrently
+        with ThreadPoolExecutor(max_workers=PROBE_WORKERS) as executor:
+            available = [idx for idx in executor.map(probe_camera, range(max_index)) if idx is not None]
+        save_cached_indices(available)
         return available
 
+    def rescan_cameras(self, known, max_index):
+        # skips the cached indices, which are already open or about to be
+        with ThreadPoolExecutor(max_workers=PROBE_WORKERS) as executor:
+            found = [
+                idx
+                for idx in executor.map(probe_camera, [i for i in range(max_index) if i not in known])
+                if idx is not None
+            ]
+        if not found or self.stop_event.is_set():
+            return
+        save_cached_indices(sorted(known + found))
+        with self.frame_lock:
+            self.discovered.extend(found)
+
     def open_cameras(self):
         indices = self.enumerate_cameras()
         if not indices:
             ttk.Label(self.container, text="No cameras found.").pack(padx=20, pady=20)
             return
 
+        for idx in indices:
+            self.add_camera(idx)
+
+    def add_camera(self, idx):
         columns = 2
-        for i, idx in enumerate(indices):
-            frame = ttk.Frame(self.container)
-            row = i // columns
-            col = i % columns
-            frame.grid(row=row, column=col, padx=10, pady=10, sticky="nsew")
-            self.container.grid_columnconfigure(col, weight=1)
-            self.container.grid_rowconfigure(row, weight=1)
-
-            label = ttk.Label(frame, text=f"Camera ID: {idx}", anchor="center")
-            label.pack()
-            panel = ttk.Label(frame)
-            panel.pack(fill="both", expand=True)
-
-            cap = cv2.VideoCapture(idx)
-            if not cap.isOpened():
-                panel.config(text="Unable to open stream.")
-                cap.release()
-                continue
+        i = self.camera_slots
+        self.camera_slots += 1
+        frame = ttk.Frame(self.container)
+        row = i // columns
+        col = i % columns
+        frame.grid(row=row, column=col, padx=10, pady=10, sticky="nsew")
+        self.container.grid_columnconfigure(col, weight=1)
+        self.container.grid_rowconfigure(row, weight=1)
 
-            self.caps.append(cap)
-            self.panels.append(panel)
+        label = ttk.Label(frame, text=f"Camera ID: {idx}", anchor="center")
+        label.pack()
+        panel = ttk.Label(frame)
+        panel.pack(fill="both", expand=True)
 
-    def update_frames(self):
-        for cap, panel in zip(self.caps, self.panels):
+        cap = cv2.VideoCapture(idx)
+        if not cap.isOpened():
+            panel.config(text="Unable to open stream.")
+            cap.release()
+            return
+
+        self.caps.append(cap)
+        self.panels.append(panel)
+        self.latest_frames.append(None)
+        self.photos.append(None)
+        self.preview_buffers.append(None)
+        # blocking reads happen on a per-camera thread, not the Tk loop
+        thread = threading.Thread(target=self._grab_loop, args=(len(self.caps) - 1, cap), daemon=True)
+        thread.start()
+        self.grab_threads.append(thread)
+
+    def _grab_loop(self, index, cap):
+        while not self.stop_event.is_set():
             ret, frame = cap.read()
             if not ret:
+                self.stop_event.wait(0.01)
+                continue
+            with self.frame_lock:
+                self.latest_frames[index] = frame
+
+    def preview_buffer(self, index, size):
+        # the PPM header and pixels share one buffer per panel, and the
+        # colour conversion writes straight into the pixel part of it
+        buffer = self.preview_buffers[index]
+        if buffer is None or buffer[0] != size:
+            header = b"P6 %d %d 255 " % size
+            data = bytearray(len(header) + size[0] * size[1] * 3)
+            data[:len(header)] = header
+            pixels = np.frombuffer(data, dtype=np.uint8, offset=len(header)).reshape(size[1], size[0], 3)
+            buffer = (size, data, pixels)
+            self.preview_buffers[index] = buffer
+        return buffer
+
+    def prepare_preview(self, index, frame, panel):
+        # shrink to the panel before any colour work so later passes only
+        # touch the pixels that are actually shown
+        height, width = frame.shape[:2]
+        panel_w = panel.winfo_width()
+        panel_h = panel.winfo_height()
+        scale = 1.0
+        if panel_w > 1 and panel_h > 1:
+            scale = min(1.0, panel_w / width, panel_h / height)
+        size = (max(1, int(width * scale)), max(1, int(height * scale)))
+        _, data, pixels = self.preview_buffer(index, size)
+
+        if USE_CUDA:
+            gpu_frame = cv2.cuda_GpuMat()
+            gpu_frame.upload(frame)
+            if scale < 1.0:
+                gpu_frame = cv2.cuda.resize(gpu_frame, size, interpolation=cv2.INTER_AREA)
+            cv2.cuda.cvtColor(gpu_frame, cv2.COLOR_BGR2RGB).download(dst=pixels)
+        else:
+            if scale < 1.0:
+                frame = cv2.resize(frame, size, interpolation=cv2.INTER_AREA)
+            cv2.cvtColor(frame, cv2.COLOR_BGR2RGB, dst=pixels)
+        # Tk decodes binary PPM natively, so the pixels go straight from
+        # numpy to the photo image without a PIL copy in between; Tcl only
+        # accepts bytes, so this is the one copy left per frame
+        return size, bytes(data)
+
+    def update_frames(self):
+        with self.frame_lock:
+            discovered, self.discovered = self.discovered, []
+        for idx in discovered:
+            self.add_camera(idx)
+        for index, panel in enumerate(self.panels):
+            with self.frame_lock:
+                frame = self.latest_frames[index]
+                self.latest_frames[index] = None
+            if frame is None:
                 continue
-            rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            img = Image.fromarray(rgb)
-            imgtk = ImageTk.PhotoImage(image=img)
-            panel.imgtk = imgtk
-            panel.config(image=imgtk)
+            size, ppm = self.prepare_preview(index, frame, panel)
+            photo = self.photos[index]
+            if photo is None or (photo.width(), photo.height()) != size:
+                # the Tk image is created once per panel and repainted in place
+                photo = tk.PhotoImage(width=size[0], height=size[1])
+                self.photos[index] = photo
+                panel.config(image=photo)
+            photo.configure(data=ppm, format="ppm")
         self.root.after(100, self.update_frames)
 
     def on_close(self):
+        self.stop_event.set()
+        for thread in self.grab_threads:
+            thread.join(timeout=2.0)
         for cap in self.caps:
             cap.release()
         self.root.destroy()
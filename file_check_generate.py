@@ -3,77 +3,333 @@
 # in a csv file with a last line with a termination string
 
 import hashlib
+import mmap
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 import os
 import sys
+import threading
 
-def hash_file(filepath):
-    BUF_SIZE = 65536
-    sha256 = hashlib.sha256()
-    print('Hashing ' + str(filepath))
-    with open(filepath, 'rb') as f:
-        while True:
-            data = f.read(BUF_SIZE)
-            if not data:
+try:
+    import xxhash
+except ImportError:
+    # optional: without it every changed file is rehashed with sha256
+    xxhash = None
+
+# read size for the fallback hashing loop on Pythons without file_digest
+BUF_SIZE = 1 << 20
+# files larger than this are memory-mapped for hashing
+MMAP_THRESHOLD = 1 << 20
+# number of files hashed concurrently within one experiment
+HASH_WORKERS = min(32, (os.cpu_count() or 4) * 2)
+# files below this size are hashed in groups of HASH_BATCH_SIZE per pool task
+# so that directories of many small files are not dominated by task overhead
+SMALL_FILE_SIZE = 1 << 20
+HASH_BATCH_SIZE = 16
+
+def advise(fd, advice_name):
+    # posix_fadvise is not available on windows; the hints are skipped there
+    advice = getattr(os, advice_name, None)
+    if advice is None or not hasattr(os, 'posix_fadvise'):
+        return
+    try:
+        os.posix_fadvise(fd, 0, 0, advice)
+    except OSError:
+        pass
+
+def prefetch_file(filepath):
+    # ask the kernel to start reading a file we are about to hash
+    if not hasattr(os, 'posix_fadvise'):
+        return
+    try:
+        fd = os.open(filepath, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        advise(fd, 'POSIX_FADV_WILLNEED')
+    finally:
+        os.close(fd)
+
+def parse_cpulist(text):
+    # expands a sysfs cpu list such as "0-7,16-23" into a set of cpu ids
+    cpus = set()
+    for part in text.strip().split(','):
+        if not part:
+            continue
+        first, _, last = part.partition('-')
+        cpus.update(range(int(first), int(last or first) + 1))
+    return cpus
+
+def numa_cpus_for(path):
+    # cpus local to the NUMA node of the block device holding path, or None
+    # when this cannot be determined (non-linux, single node, virtual fs)
+    if not hasattr(os, 'sched_setaffinity'):
+        return None
+    try:
+        dev = os.stat(path).st_dev
+        block_dir = f'/sys/dev/block/{os.major(dev)}:{os.minor(dev)}'
+        node = None
+        # partitions carry no device link of their own, so also try the parent
+        for device_dir in (block_dir, os.path.join(block_dir, '..')):
+            numa_file = os.path.join(device_dir, 'device', 'numa_node')
+            if os.path.exists(numa_file):
+                with open(numa_file) as f:
+                    node = int(f.read())
                 break
-            sha256.update(data)
-    return sha256.hexdigest()
+        if node is None or node < 0:
+            return None
+        with open(f'/sys/devices/system/node/node{node}/cpulist') as f:
+            cpus = parse_cpulist(f.read()) & os.sched_getaffinity(0)
+    except (OSError, ValueError):
+        return None
+    return cpus or None
+
+def pin_worker(cpus):
+    # keeps hashing threads on the node the data arrives on
+    if cpus:
+        try:
+            os.sched_setaffinity(0, cpus)
+        except OSError:
+            pass
+
+_worker_state = threading.local()
+
+def read_buffer():
+    # one read buffer per hashing thread, reused for every file it hashes
+    buf = getattr(_worker_state, 'buf', None)
+    if buf is None:
+        buf = _worker_state.buf = memoryview(bytearray(BUF_SIZE))
+    return buf
 
-def generate_file_data(local_repos_dir, output_stem,recursive_search):
+def update_from_open_file(hashers, f):
+    # feeds the rest of an open file into every hasher in a single read
+    if os.fstat(f.fileno()).st_size > MMAP_THRESHOLD:
+        # hash straight out of the page cache instead of copying each
+        # chunk into a python buffer first
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            if hasattr(mm, 'madvise') and hasattr(mmap, 'MADV_SEQUENTIAL'):
+                mm.madvise(mmap.MADV_SEQUENTIAL)
+            if len(hashers) == 1:
+                hashers[0].update(mm)
+                return hashers
+            # with several hashers the map is walked in chunks, so each
+            # chunk is still in cache when the next hasher reads it
+            with memoryview(mm) as view:
+                for start in range(0, len(view), BUF_SIZE):
+                    chunk = view[start:start + BUF_SIZE]
+                    for hasher in hashers:
+                        hasher.update(chunk)
+                    chunk.release()
+        return hashers
+    buf = read_buffer()
+    while True:
+        n = f.readinto(buf)
+        if not n:
+            break
+        for hasher in hashers:
+            hasher.update(buf[:n])
+    return hashers
+
+def digest_open_file(f, with_fast=False):
+    # the one place sha256 digests are computed; returns (sha256, xxh3) hex
+    # digests, where xxh3 is only computed, in the same read, when asked for
+    # and xxhash is installed. large files are hashed from a memory map,
+    # smaller ones through file_digest where available
+    if with_fast and xxhash is not None:
+        sha256, fast = update_from_open_file([hashlib.sha256(), xxhash.xxh3_128()], f)
+        return sha256.hexdigest(), fast.hexdigest()
+    if os.fstat(f.fileno()).st_size <= MMAP_THRESHOLD and hasattr(hashlib, 'file_digest'):
+        # python 3.11+: the read/update loop runs in C against OpenSSL
+        return hashlib.file_digest(f, 'sha256').hexdigest(), None
+    return update_from_open_file([hashlib.sha256()], f)[0].hexdigest(), None
+
+def fast_hash_file(filepath):
+    # xxh3 digest stored in the sidecar cache only, never in the file check
+    with open(filepath, 'rb', buffering=0) as f:
+        advise(f.fileno(), 'POSIX_FADV_SEQUENTIAL')
+        try:
+            return update_from_open_file([xxhash.xxh3_128()], f)[0].hexdigest()
+        finally:
+            advise(f.fileno(), 'POSIX_FADV_DONTNEED')
+
+def hash_file(filepath, known=None, with_fast=False):
+    # known is the (xxh3, sha256) pair recorded for this file on an earlier
+    # run; while its xxh3 still matches, the sha256 is kept rather than
+    # recomputed, since xxh3 is many times cheaper. with_fast asks for the
+    # xxh3 digest as well, which only refresh runs record
+    if known is not None and xxhash is not None:
+        fast = fast_hash_file(filepath)
+        if fast == known[0]:
+            return known[1], fast
+    print('Hashing ' + str(filepath))
+    with open(filepath, 'rb', buffering=0) as f:
+        advise(f.fileno(), 'POSIX_FADV_SEQUENTIAL')
+        try:
+            return digest_open_file(f, with_fast)
+        finally:
+            # each file is read once, so drop it from the page cache
+            advise(f.fileno(), 'POSIX_FADV_DONTNEED')
+
+def hash_batch(batch, with_fast=False):
+    # batch holds (filepath, known) pairs, see hash_file
+    hashes = []
+    for i, (filepath, known) in enumerate(batch):
+        if i + 1 < len(batch):
+            # overlap the read of the next file with hashing this one
+            prefetch_file(batch[i + 1][0])
+        hashes.append(hash_file(filepath, known, with_fast))
+    return hashes
+
+def batch_files(files, sizes):
+    # runs of small files are grouped into one batch, large files get their own
+    batches = []
+    current = []
+    for filepath, size in zip(files, sizes):
+        if size >= SMALL_FILE_SIZE:
+            if current:
+                batches.append(current)
+                current = []
+            batches.append([filepath])
+            continue
+        current.append(filepath)
+        if len(current) == HASH_BATCH_SIZE:
+            batches.append(current)
+            current = []
+    if current:
+        batches.append(current)
+    return batches
+
+def is_file_check_name(name):
+    # file checks, their sidecar caches and temporaries of any stem
+    return name.startswith('file_check_') and name.endswith(('.txt', '.cache', '.tmp'))
+
+def walk_files(root_path, recursive_search):
+    # scandir stack yielding (DirEntry, rel_path) for each file; the relative
+    # path is built up per directory instead of derived for every file, and
+    # DirEntry.stat reuses what the directory listing already returned
+    pending = [(str(root_path), '')]
+    while pending:
+        dir_path, rel_dir = pending.pop()
+        with os.scandir(dir_path) as it:
+            for entry in it:
+                if not rel_dir and is_file_check_name(entry.name):
+                    # written by this script into the experiment folder
+                    continue
+                if entry.is_file(follow_symlinks=False):
+                    yield entry, rel_dir + entry.name
+                elif recursive_search == True and entry.is_dir(follow_symlinks=False):
+                    pending.append((entry.path, rel_dir + entry.name + '/'))
+
+def load_file_check_cache(path):
+    # maps rel_path -> (size, mtime_ns, hash, xxh3) from the sidecar cache
+    # written next to a file check; xxh3 is None where it was not recorded.
+    # the file check itself keeps the plain path|size|sha256 format, so
+    # without a sidecar every file is rehashed
+    cache = {}
+    if not os.path.exists(path):
+        return cache
+    with open(path, 'r') as f:
+        for line in f:
+            parts = line.rstrip('\n').split('|')
+            if len(parts) < 4:
+                continue
+            try:
+                cache[parts[0]] = (int(parts[1]), int(parts[2]), parts[3], parts[4] if len(parts) > 4 else None)
+            except ValueError:
+                continue
+    return cache
+
+def generate_file_data(local_repos_dir, output_stem,recursive_search, refresh=False):
     # local_repos_dir is the path to local repos of experiments
+    # with refresh, existing hash files are rewritten, rehashing only files
+    # whose size or modification time changed since they were listed
     output_file = 'file_check_' + output_stem + '.txt'
+    # size, mtime and digests used by refresh, kept out of the file check
+    # and only written when refreshing
+    cache_file = 'file_check_' + output_stem + '.cache'
 
     local_repos_dir = Path(local_repos_dir)
-    animal_list = []
     # create list of animal dirs
-    for entry in local_repos_dir.iterdir():
-        if entry.is_dir():
-            animal_list.append(entry)
-            
+    with os.scandir(local_repos_dir) as it:
+        animal_list = [Path(entry.path) for entry in it if entry.is_dir(follow_symlinks=False)]
+
     if recursive_search:
         print('Running in recursive mode')
     # iterate through animal dirs, listing experiments and hashing each
     for iAnimal in range(len(animal_list)):
-        animal_dir = Path(animal_list[iAnimal])
-        exp_list = []
-        animalID = os.path.basename(os.path.normpath(animal_dir))
+        animal_dir = animal_list[iAnimal]
+        animalID = animal_dir.name
         print('Starting animalID: ' + animalID)
         # create list of experiment dirs
-        for entry in animal_dir.iterdir():
-            if entry.is_dir():
-                exp_list.append(entry)
+        with os.scandir(animal_dir) as it:
+            exp_list = [Path(entry.path) for entry in it if entry.is_dir(follow_symlinks=False)]
 
         # iterate through experiments
         for exp_path in exp_list:
-            expID = os.path.basename(os.path.normpath(exp_path))
+            expID = exp_path.name
             print('Starting expID: ' + expID)
-            output_file_path = os.path.join(exp_path,output_file)
+            output_file_path = exp_path / output_file
+            cache_file_path = exp_path / cache_file
             # check if data in folder has already been hashed
-            if not os.path.exists(output_file_path):
+            if refresh or not os.path.exists(output_file_path):
                 # then hash all files
-                root_path = Path(exp_path)
-                file_data = []
-                total_size = 0
-                if recursive_search == True:
-                    for filepath in root_path.glob('**/*'):
-                        if filepath.is_file():
-                            rel_path = filepath.relative_to(root_path).as_posix()
-                            size = filepath.stat().st_size
-                            file_hash = hash_file(filepath)
-                            file_data.append((rel_path, size, file_hash))
-                            total_size += size
-                else:
-                    for filepath in root_path.iterdir():
-                        if filepath.is_file():
-                            rel_path = filepath.relative_to(root_path).as_posix()
-                            size = filepath.stat().st_size
-                            file_hash = hash_file(filepath)
-                            file_data.append((rel_path, size, file_hash))
-                            total_size += size
-                with open(output_file_path, 'w') as f:
+                cache = load_file_check_cache(cache_file_path) if refresh else {}
+                found = []
+                for entry, rel_path in walk_files(exp_path, recursive_search):
+                    st = entry.stat(follow_symlinks=False)
+                    found.append((rel_path, entry.path, st.st_size, st.st_mtime_ns))
+                # sort so the output order does not depend on thread scheduling
+                found.sort()
+                is_cached = []
+                files = []
+                sizes = []
+                for rel_path, filepath, size, mtime_ns in found:
+                    cached = cache.get(rel_path)
+                    hit = cached is not None and cached[:2] == (size, mtime_ns)
+                    is_cached.append(hit)
+                    if not hit:
+                        # touched but the same size: the stored xxh3 can
+                        # still show the content is unchanged
+                        known = None
+                        if cached is not None and cached[0] == size and cached[3]:
+                            known = (cached[3], cached[2])
+                        files.append((filepath, known))
+                        sizes.append(size)
+                if refresh:
+                    print(f'Reusing {len(found) - len(files)} cached hashes')
+                # the sizes are known from the walk, so the header can be
+                # written first and each entry streamed out as it is hashed;
+                # the temporary file only replaces the real one when complete
+                total_size = sum(size for _, _, size, _ in found)
+                tmp_path = exp_path / (output_file + '.tmp')
+                cache_tmp_path = exp_path / (cache_file + '.tmp')
+                cache_lines = []
+                # hashlib releases the GIL while hashing, so threads overlap
+                # both the disk reads and the digest computation
+                # on multi-socket machines the workers are pinned to the
+                # NUMA node of the disk the experiment is stored on
+                numa_cpus = numa_cpus_for(exp_path) if files else None
+                with ThreadPoolExecutor(max_workers=HASH_WORKERS, initializer=pin_worker,
+                                        initargs=(numa_cpus,)) as executor, open(tmp_path, 'w') as f:
+                    hashes = (
+                        file_hash
+                        for batch_hashes in executor.map(lambda batch: hash_batch(batch, refresh),
+                                                         batch_files(files, sizes))
+                        for file_hash in batch_hashes
+                    )
                     f.write(f"Total size: {total_size}\n")
-                    for rel_path, size, file_hash in file_data:
+                    for (rel_path, _, size, mtime_ns), hit in zip(found, is_cached):
+                        file_hash, fast_hash = cache[rel_path][2:] if hit else next(hashes)
                         f.write(f"{rel_path}|{size}|{file_hash}\n")
+                        if refresh:
+                            # the xxh3 digest is an optional trailing field
+                            fast_field = f"|{fast_hash}" if fast_hash else ''
+                            cache_lines.append(f"{rel_path}|{size}|{mtime_ns}|{file_hash}{fast_field}\n")
+                if refresh:
+                    with open(cache_tmp_path, 'w') as cache_f:
+                        cache_f.writelines(cache_lines)
+                    os.replace(cache_tmp_path, cache_file_path)
+                os.replace(tmp_path, output_file_path)
             else:
                 print('Skipping as hash file already found')
     print('All hashing complete')
@@ -90,8 +346,10 @@ def main():
         root_path = '/home/adamranson/temp/repos'
         output_file = 'scanimage'
         recursive_search = True
-        
-    generate_file_data(root_path,output_file,recursive_search)
+    # optional 4th argument: "refresh" to update existing hash files in place
+    refresh = len(sys.argv) > 4 and sys.argv[4].strip().lower() in ('refresh', 'true', '1')
+
+    generate_file_data(root_path,output_file,recursive_search,refresh)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
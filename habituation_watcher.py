@@ -1,13 +1,17 @@
 import argparse
+import atexit
 import csv
+import io
 import logging
+import logging.handlers
 import os
+import queue
 import re
 import select
 import sys
 import time
 from dataclasses import dataclass
-from typing import List, Set, Tuple
+from typing import Iterable, List, Optional, Set, Tuple
 
 # Defaults for watcher behavior when not provided by the YAML config.
 DEFAULT_CONFIG_PATH = "habituation_watcher.yaml"
@@ -89,18 +93,100 @@ def load_processed(path: str) -> Set[str]:
         return {line.strip() for line in f if line.strip()}
 
 
-def append_processed(path: str, exp_id: str) -> None:
-    os.makedirs(os.path.dirname(path), exist_ok=True)
-    with open(path, "a") as f:
-        f.write(exp_id + "\n")
+class ProcessedStore:
+    """In-memory set of processed experiment IDs backed by the text list.
 
+    The file keeps its one-ID-per-line format. It is opened once for
+    appending and line-buffered, so each new ID still reaches disk as soon
+    as it is recorded without reopening the file per write.
+    """
 
-def read_exp_list(path: str) -> List[str]:
-    if not os.path.exists(path):
-        return []
-    with open(path, newline="") as f:
-        reader = csv.reader(f)
-        return [row[0].strip() for row in reader if row and row[0].strip()]
+    def __init__(self, path: str):
+        self.path = path
+        self.ids = load_processed(path)
+        self._file: Optional[io.TextIOWrapper] = None
+
+    def __contains__(self, exp_id: str) -> bool:
+        return exp_id in self.ids
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def add(self, exp_id: str) -> None:
+        if exp_id in self.ids:
+            return
+        if self._file is None:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            self._file = open(self.path, "a", buffering=1)
+        self._file.write(exp_id + "\n")
+        self.ids.add(exp_id)
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+def parse_exp_ids(lines: Iterable[str]) -> List[str]:
+    reader = csv.reader(lines)
+    return [row[0].strip() for row in reader if row and row[0].strip()]
+
+
+class ExpListReader:
+    """Re-reads the append-only experiment list only when it has changed.
+
+    Polls where the file's mtime and size are unchanged return the cached
+    IDs; when rows have been appended only the new bytes are parsed. A file
+    that shrank or was rewritten in place is read again from the start.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._exp_ids: List[str] = []
+        self._offset = 0
+        self._mtime_ns: Optional[int] = None
+
+    def _reset(self) -> None:
+        self._exp_ids = []
+        self._offset = 0
+        self._mtime_ns = None
+
+    def read(self) -> List[str]:
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            self._reset()
+            return []
+        if st.st_mtime_ns == self._mtime_ns and st.st_size == self._offset:
+            return self._exp_ids
+
+        with open(self.path, "rb") as f:
+            if st.st_size < self._offset:
+                self._reset()
+            elif self._offset:
+                # the consumed prefix must still end on a row boundary,
+                # otherwise the file was not simply appended to
+                f.seek(self._offset - 1)
+                if f.read(1) != b"\n":
+                    self._reset()
+            f.seek(self._offset)
+            data = f.read()
+
+        # only complete rows are cached; a trailing row without a newline is
+        # parsed for this poll and read again next time in case it grows
+        end = data.rfind(b"\n") + 1
+        if end:
+            self._exp_ids.extend(self._parse(data[:end]))
+            self._offset += end
+        self._mtime_ns = st.st_mtime_ns
+        if end < len(data):
+            return self._exp_ids + self._parse(data[end:])
+        return self._exp_ids
+
+    @staticmethod
+    def _parse(data: bytes) -> List[str]:
+        text = data.decode("utf-8", errors="replace")
+        return parse_exp_ids(io.StringIO(text, newline=""))
 
 
 def setup_logging(log_path: str) -> logging.Logger:
@@ -116,11 +202,18 @@ def setup_logging(log_path: str) -> logging.Logger:
     if not logger.handlers:
         ch = logging.StreamHandler(sys.stdout)
         ch.setFormatter(formatter)
-        logger.addHandler(ch)
 
         fh = logging.FileHandler(log_path)
         fh.setFormatter(formatter)
-        logger.addHandler(fh)
+
+        # records are only queued on the calling thread; the console and
+        # file writes happen on the listener's thread
+        log_queue: "queue.Queue[logging.LogRecord]" = queue.Queue(-1)
+        logger.addHandler(logging.handlers.QueueHandler(log_queue))
+        listener = logging.handlers.QueueListener(log_queue, ch, fh)
+        listener.start()
+        # stopping the listener drains anything still queued at exit
+        atexit.register(listener.stop)
 
     return logger
 
@@ -256,13 +349,14 @@ def run_loop(cfg: WatcherConfig) -> None:
     logger = setup_logging(cfg.log_path)
     logger.info("Starting watcher with config: %s", cfg)
 
-    processed = load_processed(cfg.processed_list_path)
+    processed = ProcessedStore(cfg.processed_list_path)
     logger.info("Loaded %d already-processed experiment IDs", len(processed))
+    exp_list = ExpListReader(cfg.experiment_list_path)
 
     # first poll immediately
     while True:
         try:
-            exp_ids = read_exp_list(cfg.experiment_list_path)
+            exp_ids = exp_list.read()
             new_ids = [eid for eid in exp_ids if eid not in processed]
             if new_ids:
                 logger.info("Found %d new experiment IDs", len(new_ids))
@@ -274,7 +368,6 @@ def run_loop(cfg: WatcherConfig) -> None:
                             exp_id,
                             DISCARD_MARKER_NAME,
                         )
-                        append_processed(cfg.processed_list_path, exp_id)
                         processed.add(exp_id)
                         continue
                     ready, reason = exp_data_ready(exp_id, cfg)
@@ -291,17 +384,16 @@ def run_loop(cfg: WatcherConfig) -> None:
                             exp_id,
                             DISCARD_MARKER_NAME,
                         )
-                        append_processed(cfg.processed_list_path, exp_id)
                         processed.add(exp_id)
                         continue
                     enqueue_exp(logger, exp_id, cfg.simulate)
-                    append_processed(cfg.processed_list_path, exp_id)
                     processed.add(exp_id)
                 except Exception as e:
                     logger.exception("Failed to enqueue %s: %s", exp_id, e)
             interactive_wait_for_next_poll(cfg.poll_interval_seconds)
         except KeyboardInterrupt:
             logger.info("Stopping watcher (keyboard interrupt)")
+            processed.close()
             break
         except Exception as e:
             logger.exception("Watcher loop error: %s", e)
@@ -9,9 +9,15 @@ import time
 import serial
 import os
 import csv
+import queue
+import re
 import configparser
 import json
+import shutil
+import subprocess
 import winreg
+from concurrent.futures import ThreadPoolExecutor, wait
+from dataclasses import dataclass
 from datetime import datetime
 from PIL import Image, ImageTk
 import imagingcontrol4 as ic4
@@ -26,6 +32,44 @@ LOCK_STATE_COLORS = {
 }
 LOCK_STATE_INACTIVE_BG = "#efefef"
 LOCK_STATE_INACTIVE_FG = "#333333"
+# Arduino status lines are "<brake>;<wheel position>;<mode>"
+ARDUINO_STATUS_RE = re.compile(r"^\s*([^;]*?)\s*;\s*([^;]*?)\s*;\s*([^;]*?)\s*$")
+BRAKE_TEXT = {"0": "locked", "1": "unlocked"}
+# receive queue requested from the serial driver for Arduino status lines
+SERIAL_RX_BUFFER = 4096
+# longest wait between preview ticks when following a slow camera
+MAX_DISPLAY_INTERVAL_S = 0.25
+# frames waiting for the video writer before new ones are dropped
+WRITE_QUEUE_SIZE = 32
+# how long a stopped writer thread keeps encoding queued frames before it
+# discards the rest and saves what it has
+WRITER_STOP_TIMEOUT_S = 5.0
+# how long closing the app waits for writer threads to save their files
+WRITER_FINISH_TIMEOUT_S = 20.0
+# software codec recordings fall back to; the pipeline expects mp4 output
+DEFAULT_VIDEO_CODEC = "mp4v"
+# NVIDIA hardware H.264 encoder, opted into per setup with VideoCodec
+NVENC_VIDEO_CODEC = "h264_nvenc"
+NVENC_WRITER_OPTIONS = "video_codec;h264_nvenc|preset;p4|b;4M"
+# codecs that need a container other than mp4
+VIDEO_CODEC_EXTENSIONS = {"MJPG": ".avi", "XVID": ".avi", "DIVX": ".avi"}
+# frame-time rows are collected in memory and written out in batches
+CSV_FLUSH_BYTES = 1 << 16
+CSV_FLUSH_ROWS = 200
+# an ffmpeg encode that exits within this long of starting never opened
+FFMPEG_STARTUP_GRACE_S = 0.5
+# the file itself is opened with a large buffer and pushed to the OS on
+# this interval, so a crash loses at most a few seconds of rows
+CSV_FILE_BUFFER = 1 << 20
+CSV_SYNC_INTERVAL_S = 5.0
+
+try:
+    USE_CUDACODEC = (
+        hasattr(cv2.cudacodec, "createVideoWriter")
+        and cv2.cuda.getCudaEnabledDeviceCount() > 0
+    )
+except (AttributeError, cv2.error):
+    USE_CUDACODEC = False
 
 
 def normalize_lock_state(value):
@@ -35,16 +79,17 @@ def normalize_lock_state(value):
     return state if state in LOCK_STATE_SEQUENCE else None
 
 
+_BOOL_MAP = {
+    "1": True, "true": True, "yes": True, "y": True, "on": True,
+    "0": False, "false": False, "no": False, "n": False, "off": False,
+}
+
+
 def parse_bool(value, default=False):
     """Return a best-effort bool from config text."""
     if value is None:
         return default
-    val = str(value).strip().lower()
-    if val in ("1", "true", "yes", "y", "on"):
-        return True
-    if val in ("0", "false", "no", "n", "off"):
-        return False
-    return default
+    return _BOOL_MAP.get(str(value).strip().lower(), default)
 
 
 def parse_optional_float(value):
@@ -65,16 +110,228 @@ def parse_optional_text(value):
     return text or None
 
 
-def generate_file_paths(mouse_id, exp_id, setup_index, root_dir):
+def generate_file_paths(mouse_id, exp_id, setup_index, root_dir, video_ext=".mp4"):
     """Generate output file paths inside the animal/expID directory."""
     safe_mouse_id = mouse_id if mouse_id else "unknown"
     animal_dir = os.path.join(root_dir, safe_mouse_id, exp_id)
     os.makedirs(animal_dir, exist_ok=True)
-    video_path = os.path.join(animal_dir, f"{exp_id}_habit.mp4")
+    video_path = os.path.join(animal_dir, f"{exp_id}_habit{video_ext}")
     csv_path = os.path.join(animal_dir, f"{exp_id}_frame_times.csv")
     return video_path, csv_path
 
 
+_writer_options_lock = threading.Lock()
+# fourcc codes by codec name, computed on first use
+_fourcc_cache = {}
+
+
+def video_fourcc(codec):
+    """Return the cached VideoWriter fourcc code for a four-character codec name."""
+    fourcc = _fourcc_cache.get(codec)
+    if fourcc is None:
+        fourcc = _fourcc_cache[codec] = cv2.VideoWriter_fourcc(*codec)
+    return fourcc
+
+
+def open_nvenc_writer(video_path, fps, size):
+    """Open an H.264 VideoWriter that encodes on the GPU through FFmpeg's NVENC."""
+    # OpenCV's FFmpeg backend reads its encoder options from the environment
+    # when a writer is opened, so set them only around this one open
+    with _writer_options_lock:
+        previous = os.environ.get("OPENCV_FFMPEG_WRITER_OPTIONS")
+        os.environ["OPENCV_FFMPEG_WRITER_OPTIONS"] = NVENC_WRITER_OPTIONS
+        try:
+            return cv2.VideoWriter(video_path, cv2.CAP_FFMPEG, video_fourcc("avc1"), fps, size)
+        finally:
+            if previous is None:
+                del os.environ["OPENCV_FFMPEG_WRITER_OPTIONS"]
+            else:
+                os.environ["OPENCV_FFMPEG_WRITER_OPTIONS"] = previous
+
+
+# whether an ffmpeg executable on PATH can encode with NVENC; set once by
+# probe_ffmpeg_nvenc, which App starts in the background at load time
+_ffmpeg_nvenc_available = False
+
+
+def probe_ffmpeg_nvenc():
+    """Test whether ffmpeg on PATH can open an h264_nvenc encoder and cache the result."""
+    global _ffmpeg_nvenc_available
+    ffmpeg = shutil.which("ffmpeg")
+    available = False
+    if ffmpeg is not None:
+        # encode one synthetic frame; listing the encoders would not show
+        # whether a usable GPU and driver are present
+        try:
+            result = subprocess.run(
+                [
+                    ffmpeg, "-hide_banner", "-loglevel", "error",
+                    "-f", "lavfi", "-i", "color=size=256x256",
+                    "-frames:v", "1", "-c:v", "h264_nvenc", "-f", "null", "-",
+                ],
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+                timeout=10,
+                creationflags=getattr(subprocess, "CREATE_NO_WINDOW", 0),
+            )
+            available = result.returncode == 0
+        except (OSError, subprocess.SubprocessError):
+            available = False
+    _ffmpeg_nvenc_available = available
+    return available
+
+
+def ffmpeg_nvenc_available():
+    """Return the cached probe result; False until the probe has succeeded."""
+    return _ffmpeg_nvenc_available
+
+
+class FFmpegNvencWriter:
+    """VideoWriter look-alike that pipes raw frames to an ffmpeg NVENC encode."""
+
+    def __init__(self, video_path, fps, size):
+        self.size = size
+        # I420 needs even dimensions; it is what NVENC encodes, so converting
+        # here with OpenCV saves ffmpeg a conversion and halves the pipe traffic
+        self.send_i420 = size[0] % 2 == 0 and size[1] % 2 == 0
+        command = [
+            shutil.which("ffmpeg") or "ffmpeg", "-hide_banner", "-loglevel", "error", "-y",
+            "-f", "rawvideo", "-pix_fmt", "yuv420p" if self.send_i420 else "bgr24",
+            "-s", f"{size[0]}x{size[1]}", "-r", f"{fps}",
+            "-i", "-",
+            "-c:v", "h264_nvenc", "-preset", "p4", "-tune", "ll", "-rc", "vbr", "-cq", "23",
+            "-pix_fmt", "yuv420p",
+            video_path,
+        ]
+        try:
+            self.process = subprocess.Popen(
+                command,
+                stdin=subprocess.PIPE,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+                creationflags=getattr(subprocess, "CREATE_NO_WINDOW", 0),
+            )
+        except OSError:
+            self.process = None
+            return
+        # a bad output path or missing encoder makes ffmpeg exit straight
+        # away; give it that long before the writer counts as opened
+        try:
+            self.process.wait(timeout=FFMPEG_STARTUP_GRACE_S)
+        except subprocess.TimeoutExpired:
+            pass
+        else:
+            self.release()
+
+    def isOpened(self):
+        return self.process is not None and self.process.poll() is None
+
+    def write(self, frame):
+        # failures raise so the writer thread records them instead of the
+        # frame times running on past the end of the video
+        if self.process is None:
+            raise RuntimeError("ffmpeg NVENC writer is not open")
+        returncode = self.process.poll()
+        if returncode is not None:
+            self.release()
+            raise RuntimeError(f"ffmpeg NVENC exited with code {returncode}")
+        if self.send_i420:
+            frame = cv2.cvtColor(frame, cv2.COLOR_BGR2YUV_I420)
+        if isinstance(frame, cv2.UMat):
+            frame = frame.get()
+        if not frame.flags.c_contiguous:
+            frame = frame.copy()
+        try:
+            self.process.stdin.write(frame.data)
+        except OSError as exc:
+            self.release()
+            raise RuntimeError("ffmpeg NVENC exited") from exc
+
+    def release(self):
+        process = self.process
+        if process is None:
+            return
+        self.process = None
+        try:
+            process.stdin.close()
+        except OSError:
+            pass
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait()
+
+
+class CudaCodecWriter:
+    """VideoWriter look-alike that encodes from GPU memory through cv2.cudacodec."""
+
+    def __init__(self, video_path, fps, size):
+        # the NVENC session is created here, so this raises cv2.error when
+        # no encoder session is available (driver, GPU or session limit)
+        self.writer = cv2.cudacodec.createVideoWriter(video_path, size, cv2.cudacodec.H264, fps)
+        # frames are uploaded into one reused device buffer
+        self.gpu_frame = cv2.cuda_GpuMat()
+
+    def isOpened(self):
+        # a writer whose encode failed is released, so this turns False
+        return self.writer is not None
+
+    def write(self, frame):
+        # failures raise so the writer thread records them instead of the
+        # frame times running on past the end of the video
+        if self.writer is None:
+            raise RuntimeError("CUDA video writer is not open")
+        if isinstance(frame, cv2.UMat):
+            frame = frame.get()
+        try:
+            self.gpu_frame.upload(frame)
+            self.writer.write(self.gpu_frame)
+        except cv2.error:
+            self.release()
+            raise
+
+    def release(self):
+        writer = self.writer
+        self.writer = None
+        if writer is not None:
+            writer.release()
+
+
+def open_video_writer(video_path, codec, fps, size):
+    """Open a VideoWriter, asking for hardware encoding where OpenCV supports it."""
+    if codec == NVENC_VIDEO_CODEC:
+        if USE_CUDACODEC:
+            # OpenCV built with NVIDIA Video Codec SDK support encodes
+            # straight from device memory
+            try:
+                return CudaCodecWriter(video_path, fps, size)
+            except cv2.error:
+                pass
+        writer = open_nvenc_writer(video_path, fps, size)
+        # OpenCV's bundled FFmpeg is often built without NVENC; an ffmpeg
+        # install that has it can still take the encode
+        if writer.isOpened() or not ffmpeg_nvenc_available():
+            return writer
+        writer.release()
+        return FFmpegNvencWriter(video_path, fps, size)
+    fourcc = video_fourcc(codec)
+    if hasattr(cv2, "VIDEOWRITER_PROP_HW_ACCELERATION"):
+        # ANY falls back to software encoding when no accelerator is present
+        writer = cv2.VideoWriter(
+            video_path,
+            cv2.CAP_FFMPEG,
+            fourcc,
+            fps,
+            size,
+            [cv2.VIDEOWRITER_PROP_HW_ACCELERATION, cv2.VIDEO_ACCELERATION_ANY],
+        )
+        if writer.isOpened():
+            return writer
+        writer.release()
+    return cv2.VideoWriter(video_path, fourcc, fps, size)
+
+
 def write_experiment_metadata(exp_id, animal_id, exp_dir):
     """Write remote experiment metadata expected by the pipeline."""
     metadata_path = os.path.join(exp_dir, f"{exp_id}_experiment_metadata.json")
@@ -89,6 +346,10 @@ def write_experiment_metadata(exp_id, animal_id, exp_dir):
         json.dump(metadata, metadata_file)
 
 
+# last expID number handed out per (animal directory, date) by this process
+_last_exp_numbers = {}
+
+
 def create_exp_id(mouse_id, remote_repo):
     """
     Replicate the MATLAB newExpID logic:
@@ -101,49 +362,144 @@ def create_exp_id(mouse_id, remote_repo):
     os.makedirs(animal_dir, exist_ok=True)
 
     current_date = datetime.now().strftime("%Y-%m-%d")
-    base_exp_number = 0
+    # list the animal directory once rather than probing each candidate on
+    # the share, then take the first number not used today
+    prefix = f"{current_date}_"
+    suffix = f"_{safe_mouse_id}"
+    used_numbers = set()
+    cache_key = (animal_dir, current_date)
+    # after the first session of the day the listing is skipped and the
+    # search resumes past the last number this process created
+    base_exp_number = _last_exp_numbers.get(cache_key)
+    if base_exp_number is None:
+        base_exp_number = 0
+        with os.scandir(animal_dir) as entries:
+            for entry in entries:
+                name = entry.name
+                if name.startswith(prefix) and name.endswith(suffix):
+                    number_text = name[len(prefix):len(name) - len(suffix)]
+                    if number_text.isdigit():
+                        used_numbers.add(int(number_text))
     while True:
         base_exp_number += 1
+        if base_exp_number in used_numbers:
+            continue
         base_exp_number_str = f"{base_exp_number:02d}"
         possible_exp_id = f"{current_date}_{base_exp_number_str}_{safe_mouse_id}"
         candidate_dir = os.path.join(animal_dir, possible_exp_id)
-        if not os.path.exists(candidate_dir):
-            os.makedirs(candidate_dir, exist_ok=True)
-            write_experiment_metadata(possible_exp_id, safe_mouse_id, candidate_dir)
-            return possible_exp_id, candidate_dir
+        try:
+            os.makedirs(candidate_dir)
+        except FileExistsError:
+            # created elsewhere since the listing; try the next number
+            continue
+        _last_exp_numbers[cache_key] = base_exp_number
+        write_experiment_metadata(possible_exp_id, safe_mouse_id, candidate_dir)
+        return possible_exp_id, candidate_dir
+
+
+def csv_field(text):
+    """Quote a CSV field the way csv.writer's default dialect does."""
+    if any(char in text for char in ',"\r\n'):
+        return '"' + text.replace('"', '""') + '"'
+    return text
+
+
+def format_seconds_ns(ns):
+    """Format integer nanoseconds as decimal seconds without float rounding."""
+    return f"{ns // 1_000_000_000}.{ns % 1_000_000_000:09d}"
+
+
+class FrameTimesFile:
+    """Frame-time CSV whose rows are collected in memory and written in batches."""
+
+    def __init__(self, path):
+        # rows are formatted by hand with the same quoting and \r\n line
+        # endings csv.writer produced, so the file reads back unchanged
+        self.file = open(path, 'wb', buffering=CSV_FILE_BUFFER)
+        self.file.write(b"timestamp,arduino_data\r\n")
+        self.buffer = bytearray()
+        self.pending_rows = 0
+        self.last_sync = time.monotonic()
+
+    def add_row(self, timestamp_ns, arduino_line):
+        self.buffer += f"{format_seconds_ns(timestamp_ns)},{csv_field(arduino_line)}\r\n".encode()
+        self.pending_rows += 1
+        if len(self.buffer) >= CSV_FLUSH_BYTES or self.pending_rows >= CSV_FLUSH_ROWS:
+            self.flush_buffer()
+        now = time.monotonic()
+        if now - self.last_sync >= CSV_SYNC_INTERVAL_S:
+            self.flush_buffer()
+            self.file.flush()
+            self.last_sync = now
+
+    def flush_buffer(self):
+        if self.buffer:
+            self.file.write(self.buffer)
+            self.buffer.clear()
+        self.pending_rows = 0
+
+    def close(self):
+        # make sure the frame times are on disk before the session is
+        # handed on
+        try:
+            self.flush_buffer()
+            self.file.flush()
+            os.fsync(self.file.fileno())
+        finally:
+            self.file.close()
 
 
-def append_exp_list(exp_list_dir, exp_id):
-    """Append expID and timestamp to the shared exp_list.txt file."""
-    exp_list_path = os.path.join(exp_list_dir, "exp_list.txt")
+def open_exp_list(exp_list_dir):
+    """Open the shared exp_list.txt file for appending."""
     os.makedirs(exp_list_dir, exist_ok=True)
-    with open(exp_list_path, "a", newline="") as f:
-        writer = csv.writer(f)
-        writer.writerow([exp_id, datetime.now().isoformat()])
+    return open(os.path.join(exp_list_dir, "exp_list.txt"), "a", newline="")
+
+
+def append_exp_list(exp_list_file, exp_id):
+    """Append expID and timestamp to the open exp_list.txt file."""
+    csv.writer(exp_list_file).writerow([exp_id, datetime.now().isoformat()])
+    # other machines read the list, so each entry goes to the share at once
+    exp_list_file.flush()
+
+
+@dataclass
+class SetupSpec:
+    """One camera setup as read from configuration.txt, before anything is opened."""
+    section_name: str
+    cam_id: object
+    com_port: str
+    capture_settings: dict
+    flip_horizontal: bool = False
+    flip_vertical: bool = False
+    record_size: tuple = (None, None)
+    video_codec: str = DEFAULT_VIDEO_CODEC
 
 
 class SessionClock:
-    """Recorder-owned monotonic clock shared by the video and CSV outputs."""
+    """Recorder-owned monotonic clock shared by the video and CSV outputs.
+
+    Times are integer nanoseconds from time.monotonic_ns, so differences are
+    exact; they are only converted to seconds when reported.
+    """
 
     def __init__(self):
-        self.start_time = None
+        self.start_ns = None
 
     def start(self):
-        self.start_time = time.monotonic()
+        self.start_ns = time.monotonic_ns()
 
-    def elapsed(self, now=None) -> float:
-        if self.start_time is None:
-            return 0.0
-        if now is None:
-            now = time.monotonic()
-        return max(0.0, now - self.start_time)
+    def elapsed_ns(self, now_ns=None) -> int:
+        if self.start_ns is None:
+            return 0
+        if now_ns is None:
+            now_ns = time.monotonic_ns()
+        return max(0, now_ns - self.start_ns)
 
-    def stamp(self, event_time=None) -> float:
-        if self.start_time is None:
-            return 0.0
-        if event_time is None:
-            event_time = time.monotonic()
-        return max(0.0, event_time - self.start_time)
+    def elapsed(self, now_ns=None) -> float:
+        return self.elapsed_ns(now_ns) / 1e9
+
+    def stamp(self, event_ns=None) -> float:
+        return self.elapsed_ns(event_ns) / 1e9
 
 
 # Simulated Arduino for fallback when real one is not found
@@ -162,26 +518,38 @@ class ImagingSourceQueueListener(ic4.QueueSinkListener):
     def __init__(self, buffer_count=6):
         super().__init__()
         self.buffer_count = buffer_count
+        # set from ic4's callback thread whenever new frames are queued
+        self.frames_ready = threading.Event()
 
     def sink_connected(self, sink, _image_type, min_buffers_required):
         sink.alloc_and_queue_buffers(max(self.buffer_count, min_buffers_required))
         return True
 
     def frames_queued(self, _sink):
-        return
+        self.frames_ready.set()
 
 
 class ImagingSourceCapture:
+    # frames held for the reader; 1 means read() always gets the newest frame
+    OUTPUT_BUFFERS = 1
+
     def __init__(self, device_info, capture_settings=None, logger=None):
         self.device_info = device_info
         self.capture_settings = capture_settings or {}
         self.logger = logger
         self._frame_lock = threading.Lock()
+        # notified by the drain thread each time a new frame is published
+        self._frame_ready = threading.Condition(self._frame_lock)
         self._stop_event = threading.Event()
         self._worker_thread = None
         self._latest_frame = None
+        # raw frames are copied into a small pool of reused arrays
+        self._raw_buffers = []
         self._latest_frame_id = 0
         self._last_delivered_frame_id = 0
+        # frames replaced by a newer one before the reader grabbed them
+        self.overwritten_frame_count = 0
+        self._grabbed_frame = None
         self.grabber = ic4.Grabber()
         self.grabber.device_open(device_info)
         self._opened = True
@@ -190,7 +558,7 @@ class ImagingSourceCapture:
         self.sink = ic4.QueueSink(
             self.listener,
             accepted_pixel_formats=[ic4.PixelFormat.Mono8],
-            max_output_buffers=1,
+            max_output_buffers=self.OUTPUT_BUFFERS,
         )
         self.grabber.stream_setup(self.sink, setup_option=ic4.StreamSetupOption.ACQUISITION_START)
         self._worker_thread = threading.Thread(target=self._drain_queue_loop, daemon=True)
@@ -201,8 +569,7 @@ class ImagingSourceCapture:
             return
         self.logger(message, level=level)
 
-    def _convert_buffer_to_frame(self, image):
-        array = image.numpy_copy()
+    def _convert_to_bgr(self, array):
         if array.ndim == 3 and array.shape[2] == 1:
             array = array[:, :, 0]
         if array.ndim == 2:
@@ -215,19 +582,46 @@ class ImagingSourceCapture:
                 self._stop_event.wait(0.01)
                 continue
 
+            # clear before popping so a frame queued in between still wakes us
+            self.listener.frames_ready.clear()
             image = self.sink.try_pop_output_buffer()
             if image is None:
-                self._stop_event.wait(0.001)
+                self.listener.frames_ready.wait(0.01)
                 continue
 
+            # keep the raw buffer; colour conversion is left to retrieve()
+            # so frames nobody asks for are never converted
             try:
-                frame = self._convert_buffer_to_frame(image)
+                view = image.numpy_wrap()
+                frame = self._free_raw_buffer(view)
+                if frame is None:
+                    frame = view.copy()
+                    self._raw_buffers.append(frame)
+                else:
+                    frame[...] = view
             finally:
                 image.release()
 
-            with self._frame_lock:
+            with self._frame_ready:
+                if self._latest_frame_id != self._last_delivered_frame_id:
+                    self.overwritten_frame_count += 1
                 self._latest_frame = frame
                 self._latest_frame_id += 1
+                self._frame_ready.notify_all()
+
+    def _free_raw_buffer(self, view):
+        # the published frame and the one a reader has grabbed may still be
+        # read, so with three buffers one is always free to overwrite
+        with self._frame_lock:
+            in_use = (self._latest_frame, self._grabbed_frame)
+        self._raw_buffers = [
+            buffer for buffer in self._raw_buffers
+            if buffer.shape == view.shape and buffer.dtype == view.dtype
+        ]
+        for buffer in self._raw_buffers:
+            if all(buffer is not frame for frame in in_use):
+                return buffer
+        return None
 
     def _configure_device(self):
         prop_map = self.grabber.device_property_map
@@ -266,15 +660,36 @@ class ImagingSourceCapture:
     def isOpened(self):
         return self._opened and self.grabber is not None and self.grabber.is_device_open
 
-    def read(self):
+    def grab(self):
         if not self.isOpened():
-            return False, None
+            return False
         with self._frame_lock:
             if self._latest_frame is None or self._latest_frame_id == self._last_delivered_frame_id:
-                return False, None
-            frame = self._latest_frame.copy()
+                return False
+            # the drain thread never refills the published or the grabbed
+            # buffer, so holding a reference to it is enough
+            self._grabbed_frame = self._latest_frame
             self._last_delivered_frame_id = self._latest_frame_id
-        return True, frame
+        return True
+
+    def wait_for_frame(self, timeout):
+        """Block until a frame newer than the last grabbed one is available."""
+        with self._frame_ready:
+            return self._frame_ready.wait_for(
+                lambda: self._latest_frame_id != self._last_delivered_frame_id,
+                timeout,
+            )
+
+    def retrieve(self):
+        frame = self._grabbed_frame
+        if frame is None:
+            return False, None
+        return True, self._convert_to_bgr(frame)
+
+    def read(self):
+        if not self.grab():
+            return False, None
+        return self.retrieve()
 
     def get(self, prop_id):
         if not self.isOpened():
@@ -295,6 +710,8 @@ class ImagingSourceCapture:
                 return float(prop_map.get_value_float(ic4.PropId.GAIN))
             if prop_id == cv2.CAP_PROP_CONTRAST:
                 return 0.0
+            if prop_id == cv2.CAP_PROP_BUFFERSIZE:
+                return float(self.OUTPUT_BUFFERS)
         except Exception:
             return 0.0
         return 0.0
@@ -345,6 +762,9 @@ class ImagingSourceCapture:
                 return True
             if prop_id == cv2.CAP_PROP_CONTRAST:
                 return False
+            if prop_id == cv2.CAP_PROP_BUFFERSIZE:
+                # the sink is already set up to keep only the newest frame
+                return int(value) == self.OUTPUT_BUFFERS
         except Exception as exc:
             self._log(f"Failed to set property {prop_id} to {value} on {self.device_info.serial}: {exc}", level="WARNING")
             return False
@@ -368,6 +788,7 @@ class ImagingSourceCapture:
         self.device_info = None
         with self._frame_lock:
             self._latest_frame = None
+        self._grabbed_frame = None
         self._opened = False
 
 class CameraSetup:
@@ -383,6 +804,10 @@ class CameraSetup:
         config_section=None,
         capture_settings=None,
         capture_factory=None,
+        capture=None,
+        record_size=None,
+        video_codec=DEFAULT_VIDEO_CODEC,
+        use_opencl=False,
     ):
         self.logger = logger
         self._log("Initializing camera", level="DEBUG", suffix=f" {cam_id}")
@@ -394,15 +819,28 @@ class CameraSetup:
         self.flip_horizontal = flip_horizontal
         self.flip_vertical = flip_vertical
         self.capture_settings = capture_settings or {}
+        # (width, height) to encode at; None entries keep the camera size
+        self.record_size = record_size or (None, None)
+        self.record_output_size = None
+        self.video_codec = video_codec
+        # run the record-size resize through OpenCL when available
+        self.use_opencl = use_opencl
         if capture_factory is None:
             capture_factory = cv2.VideoCapture
         self.capture_factory = capture_factory
         self.capture_lock = threading.Lock()
-        self.cap = self.capture_factory(cam_id)
+        # (width, height) reported by the capture, filled in by describe_capture
+        self.frame_size = (0, 0)
+        # an already opened capture is used as is instead of opening the
+        # device a second time
+        self.cap = capture if capture is not None else self.capture_factory(cam_id)
         self._log(self.describe_capture(), level="DEBUG")
         try:
             if com_port is not None:
                 self.serial = serial.Serial(com_port, 9600, timeout=0.1, write_timeout=1.0)
+                if hasattr(self.serial, "set_buffer_size"):
+                    # only the Windows driver lets the receive queue be sized
+                    self.serial.set_buffer_size(rx_size=SERIAL_RX_BUFFER)
                 self._log(f"Arduino connected on {com_port}", level="DEBUG")
             else:
                 raise serial.SerialException()
@@ -412,7 +850,6 @@ class CameraSetup:
         self.recording = False
         self.writer = None
         self.csv_file = None
-        self.csv_writer = None
         self.start_time = None
         self.elapsed_time = 0
         self.session_clock = None
@@ -423,14 +860,17 @@ class CameraSetup:
         self.lock_state = "automatic"
         self.lock_state_synced_from_hardware = False
         self.lock_state_user_overridden = False
-        self.latest_status = None
-        self.last_arduino_line = ""
+        # (line, parsed status) of the last Arduino message. Only the serial
+        # reader thread assigns it, always as one tuple, so readers take a
+        # consistent pair without a lock
+        self.arduino_state = ("", None)
+        self.parsed_status_cache = (None, None)
         self.last_logged_arduino_line = ""
-        self.frame_lock = threading.Lock()
-        self.latest_frame = None
-        self.latest_frame_time = None
+        # (frame, monotonic read time), published by replacing the tuple so
+        # readers always see a matching pair without taking a lock
+        self.latest_frame_packet = (None, None)
         self.last_frame_ms = 0.0
-        self.last_serial_ms = 0.0
+        self.last_serial_time = None
         self.serial_lock = threading.Lock()
         self.last_write_time = None
         self.last_write_fps = None
@@ -442,7 +882,25 @@ class CameraSetup:
         self.record_interval_s = 0.1
         self.recording_thread = None
         self.recording_stop_event = threading.Event()
+        self.write_queue = None
+        self.writer_thread = None
+        # tells the writer thread to finish the queued frames and save
+        self.writer_stop_event = None
+        # a stopped writer thread that may still be saving its files
+        self.finishing_writer_thread = None
+        self.dropped_frame_count = 0
+        # the capture's overwritten-frame count when recording started
+        self.overwritten_frame_baseline = 0
+        # set by the writer thread when encoding or the CSV write fails
+        self.writer_error = None
         self.property_limits = {}
+        self.serial_stop_event = threading.Event()
+        self.serial_thread = None
+        if not isinstance(self.serial, SimulatedArduino):
+            # the port is read on its own thread so readline never blocks the
+            # capture loop; writes still go through serial_lock
+            self.serial_thread = threading.Thread(target=self.serial_loop, daemon=True)
+            self.serial_thread.start()
 
     def describe_capture(self):
         with self.capture_lock:
@@ -452,6 +910,8 @@ class CameraSetup:
             width = self.cap.get(cv2.CAP_PROP_FRAME_WIDTH)
             height = self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT)
             fps = self.cap.get(cv2.CAP_PROP_FPS)
+        # kept so start_recording does not have to query the driver again
+        self.frame_size = (int(width), int(height))
         return (
             f"{self.name or self.cam_id}: backend={CAPTURE_BACKEND_NAME}, "
             f"opened={opened}, size={int(width)}x{int(height)}, fps={fps:.2f}"
@@ -466,9 +926,8 @@ class CameraSetup:
             if self.cap is not None and self.cap is not cap:
                 self.cap.release()
             self.cap = cap
-        with self.frame_lock:
-            self.latest_frame = None
-            self.latest_frame_time = None
+        self.overwritten_frame_baseline = 0
+        self.latest_frame_packet = (None, None)
         self.reset_fps_diagnostic()
         if description:
             self._log(f"{self.name or self.cam_id}: {description}", level="INFO")
@@ -480,9 +939,8 @@ class CameraSetup:
             if self.cap is not None:
                 self.cap.release()
             self.cap = None
-        with self.frame_lock:
-            self.latest_frame = None
-            self.latest_frame_time = None
+            self.frame_size = (0, 0)
+        self.latest_frame_packet = (None, None)
         self.reset_fps_diagnostic()
 
     def _log(self, message, level="INFO", suffix=""):
@@ -508,32 +966,72 @@ class CameraSetup:
         self.repeated_frame_write_count = 0
         self.elapsed_time = 0
         output_id = self.name or f"camera_{self.cam_id}"
-        video_path, csv_path = generate_file_paths(mouse_id, exp_id, output_id, self.root_dir)
+        video_ext = VIDEO_CODEC_EXTENSIONS.get(self.video_codec.upper(), ".mp4")
+        video_path, csv_path = generate_file_paths(mouse_id, exp_id, output_id, self.root_dir, video_ext)
         meta_path = os.path.join(os.path.dirname(video_path), f"{exp_id}_meta.txt")
         with open(meta_path, "w", newline="") as meta_file:
             meta_file.write(self.name or "")
-        fourcc = cv2.VideoWriter_fourcc(*'mp4v')
-        width = int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH))
-        height = int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
-        self.writer = cv2.VideoWriter(video_path, fourcc, self.record_fps, (width, height))
-        self.csv_file = open(csv_path, 'w', newline='')
-        self.csv_writer = csv.writer(self.csv_file)
-        self.csv_writer.writerow(['timestamp', 'arduino_data'])
+        width, height = self.frame_size
+        if not width or not height:
+            # some backends only report a size once frames are flowing
+            with self.capture_lock:
+                width = int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+                height = int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+            self.frame_size = (width, height)
+        output_size = self.resolve_record_size(width, height)
+        # frames are only resized on the writer thread when the sizes differ
+        self.record_output_size = output_size if output_size != (width, height) else None
+        self.writer = open_video_writer(video_path, self.video_codec, self.record_fps, output_size)
+        if not self.writer.isOpened() and self.video_codec != DEFAULT_VIDEO_CODEC:
+            self._log(
+                f"{self.name or self.cam_id}: could not open a '{self.video_codec}' video writer; "
+                f"falling back to {DEFAULT_VIDEO_CODEC}.",
+                level="WARNING"
+            )
+            self.writer.release()
+            video_path, csv_path = generate_file_paths(mouse_id, exp_id, output_id, self.root_dir)
+            self.writer = open_video_writer(video_path, DEFAULT_VIDEO_CODEC, self.record_fps, output_size)
+        self.csv_file = FrameTimesFile(csv_path)
+        # encoding runs on its own thread so a slow write never delays the
+        # sampling of the next frame; the thread is handed everything it
+        # writes to, so a new session can start while it is still saving
+        self.write_queue = queue.Queue(maxsize=WRITE_QUEUE_SIZE)
+        self.writer_stop_event = threading.Event()
+        self.dropped_frame_count = 0
+        # the capture counts overwrites from when it opened, so only those
+        # after this point belong to the session
+        self.overwritten_frame_baseline = getattr(self.cap, "overwritten_frame_count", 0)
+        self.writer_error = None
+        self.writer_thread = threading.Thread(
+            target=self.writer_loop,
+            args=(self.write_queue, self.writer_stop_event, self.writer, self.csv_file, self.record_output_size),
+            daemon=True,
+        )
+        self.writer_thread.start()
         self.recording = True
         self.recording_stop_event.clear()
         self.recording_thread = threading.Thread(target=self.recording_loop, daemon=True)
         self.recording_thread.start()
 
+    def resolve_record_size(self, width, height):
+        record_width, record_height = self.record_size
+        if not record_width and not record_height:
+            return width, height
+        # a single configured dimension keeps the camera's aspect ratio
+        if not record_height:
+            record_height = max(1, round(height * record_width / max(1, width)))
+        if not record_width:
+            record_width = max(1, round(width * record_height / max(1, height)))
+        return int(record_width), int(record_height)
+
     def stop_recording(self):
         self.recording = False
         self.stop_background_recording()
-        if self.writer:
-            self.writer.release()
-            self.writer = None
-        if self.csv_file:
-            self.csv_file.close()
-            self.csv_file = None
-        self.csv_writer = None
+        # the writer thread releases the video writer and closes the frame
+        # times itself once the queue is written, so Stop does not wait on it
+        self.stop_writer_thread()
+        self.writer = None
+        self.csv_file = None
         self.session_clock = None
         self.last_written_frame_time = None
         self.repeated_frame_write_count = 0
@@ -544,6 +1042,88 @@ class CameraSetup:
             self.recording_thread.join(timeout=2.0)
         self.recording_thread = None
 
+    def stop_writer_thread(self):
+        if self.writer_thread is None:
+            return
+        self.writer_stop_event.set()
+        self.finishing_writer_thread = self.writer_thread
+        self.writer_thread = None
+        self.write_queue = None
+        self.writer_stop_event = None
+        if self.dropped_frame_count:
+            self._log(
+                f"{self.name or self.cam_id}: {self.dropped_frame_count} frames were dropped because the video writer fell behind.",
+                level="WARNING"
+            )
+
+    def wait_for_writer(self, timeout):
+        thread = self.finishing_writer_thread
+        if thread is not None and thread.is_alive():
+            thread.join(timeout=timeout)
+
+    def writer_loop(self, write_queue, stop_event, writer, frame_times, output_size):
+        # the writer and frame-time file are only ever released here, after
+        # the last write, so a release can never race an encode in flight
+        failed = False
+        deadline = None
+        try:
+            while True:
+                try:
+                    item = write_queue.get(timeout=0.5)
+                except queue.Empty:
+                    if stop_event.is_set():
+                        break
+                    continue
+                if failed:
+                    # keep draining so the sampling loop never blocks on a
+                    # full queue
+                    continue
+                if stop_event.is_set():
+                    if deadline is None:
+                        deadline = time.monotonic() + WRITER_STOP_TIMEOUT_S
+                    elif time.monotonic() > deadline:
+                        self._log(
+                            f"{self.name or self.cam_id}: video writer did not finish within {WRITER_STOP_TIMEOUT_S:.0f}s; "
+                            f"discarding {write_queue.qsize() + 1} queued frames.",
+                            level="WARNING"
+                        )
+                        break
+                try:
+                    self.write_item(writer, frame_times, output_size, *item)
+                except Exception as exc:
+                    failed = True
+                    self.report_writer_error(exc, write_queue)
+        finally:
+            # rows are only added once their frame is encoded, so the ones
+            # still buffered are saved even after a failure
+            try:
+                frame_times.close()
+            except OSError as exc:
+                self._log(f"{self.name or self.cam_id}: could not save frame times: {exc}", level="ERROR")
+            try:
+                writer.release()
+            except Exception as exc:
+                self._log(f"{self.name or self.cam_id}: could not finalize the video: {exc}", level="ERROR")
+
+    def write_item(self, writer, frame_times, output_size, frame, timestamp_ns, arduino_line):
+        if output_size is not None:
+            if self.use_opencl:
+                # the writer accepts the UMat, so the frame is only
+                # downloaded once it has been shrunk
+                frame = cv2.UMat(frame)
+            frame = cv2.resize(frame, output_size, interpolation=cv2.INTER_AREA)
+        writer.write(self.apply_flips(frame))
+        frame_times.add_row(timestamp_ns, arduino_line)
+
+    def report_writer_error(self, exc, write_queue):
+        # a thread still saving a stopped session does not flag the next one
+        if write_queue is self.write_queue:
+            self.writer_error = exc
+        self._log(
+            f"{self.name or self.cam_id}: video writer failed and has stopped recording frames: {exc}",
+            level="ERROR"
+        )
+
     def recording_loop(self):
         while not self.recording_stop_event.is_set() and self.recording:
             loop_start = time.monotonic()
@@ -562,58 +1142,111 @@ class CameraSetup:
         self._log(message, level="WARNING")
         return True
 
-    def apply_flips(self, frame):
+    @property
+    def flip_code(self):
+        """cv2.flip code for the configured flips, or None for no flip."""
+        if self.flip_horizontal and self.flip_vertical:
+            return -1
         if self.flip_horizontal:
-            frame = cv2.flip(frame, 1)
+            return 1
         if self.flip_vertical:
-            frame = cv2.flip(frame, 0)
-        return frame
+            return 0
+        return None
+
+    def apply_flips(self, frame):
+        # frames are stored as captured and flipped by each consumer after
+        # it has shrunk them, so the flip never touches full-size pixels
+        # that are then thrown away
+        flip_code = self.flip_code
+        if flip_code is None:
+            return frame
+        return cv2.flip(frame, flip_code)
 
     def annotate_frame(self, frame, read_complete):
         return frame
 
-    def poll_capture(self):
+    def poll_capture(self, decode=True):
         frame_start = time.monotonic()
         with self.capture_lock:
             if self.cap is None:
                 return False
-            ret, frame = self.cap.read()
+            if decode:
+                ret, frame = self.cap.read()
+            else:
+                # nothing will show or record this frame, so only advance
+                # the capture without converting it
+                ret, frame = self.cap.grab(), None
         read_complete = time.monotonic()
         self.last_frame_ms = (read_complete - frame_start) * 1000.0
         self.update_fps_diagnostic(read_complete, ret)
-        arduino_data = ""
-        serial_start = time.monotonic()
-        with self.serial_lock:
-            while self.serial.in_waiting:
-                arduino_data = self.serial.readline().decode().strip()
-            if arduino_data:
-                self.latest_status = self.parse_arduino_status(arduino_data)
-                self.last_arduino_line = arduino_data
-        self.last_serial_ms = (time.monotonic() - serial_start) * 1000.0
         if ret:
-            frame = self.apply_flips(frame)
-            frame = self.annotate_frame(frame, read_complete)
-            with self.frame_lock:
-                self.latest_frame = frame.copy()
-                self.latest_frame_time = read_complete
+            if frame is not None:
+                frame = self.annotate_frame(frame, read_complete)
+                self.latest_frame_packet = (frame, read_complete)
             self.sync_lock_state_from_status()
             return True
         return False
 
+    def serial_loop(self):
+        pending = bytearray()
+        while not self.serial_stop_event.is_set():
+            try:
+                # take whatever has arrived in one call; with nothing waiting
+                # this returns after the port timeout
+                pending += self.serial.read(self.serial.in_waiting or 1)
+            except (serial.SerialException, OSError) as exc:
+                self._log(f"{self.name or self.cam_id}: serial read failed: {exc}", level="WARNING")
+                self.serial_stop_event.wait(1.0)
+                continue
+            end = pending.rfind(b"\n")
+            if end < 0:
+                continue
+            lines = pending[:end].split(b"\n")
+            del pending[:end + 1]
+            # only the newest complete status line matters
+            for raw_line in reversed(lines):
+                # the protocol is ASCII; strip the bytes before decoding and
+                # keep a line with a corrupted byte rather than dropping it
+                raw_line = raw_line.strip()
+                if raw_line:
+                    arduino_data = raw_line.decode("ascii", "replace")
+                    self.arduino_state = (arduino_data, self.parse_arduino_status(arduino_data))
+                    self.last_serial_time = time.monotonic()
+                    break
+
+    @property
+    def last_arduino_line(self):
+        return self.arduino_state[0]
+
+    @property
+    def latest_status(self):
+        return self.arduino_state[1]
+
+    def stop_serial_reader(self):
+        self.serial_stop_event.set()
+        if self.serial_thread is not None and self.serial_thread.is_alive():
+            self.serial_thread.join(timeout=2.0)
+        self.serial_thread = None
+
+    def wait_for_frame(self, timeout, stop_event):
+        # captures that can signal new frames are waited on directly; others
+        # are polled after a short sleep
+        cap = self.cap
+        if cap is not None and hasattr(cap, "wait_for_frame"):
+            cap.wait_for_frame(timeout)
+        else:
+            stop_event.wait(0.001)
+
+    # frames are replaced, never written to, so readers can share the array
+    # instead of copying it
     def get_latest_frame(self):
-        with self.frame_lock:
-            if self.latest_frame is None:
-                return None
-            return self.latest_frame.copy()
+        return self.latest_frame_packet[0]
 
     def get_latest_frame_packet(self):
-        with self.frame_lock:
-            if self.latest_frame is None:
-                return None, None
-            return self.latest_frame.copy(), self.latest_frame_time
+        return self.latest_frame_packet
 
     def write_latest_frame(self):
-        if not self.recording or self.writer is None or self.csv_writer is None:
+        if not self.recording or self.writer is None or self.csv_file is None:
             return False
 
         frame, frame_time = self.get_latest_frame_packet()
@@ -624,8 +1257,21 @@ class CameraSetup:
             )
             return False
 
-        timestamp = self.session_clock.stamp() if self.session_clock is not None else 0.0
-        self.writer.write(frame)
+        if self.writer_error is not None:
+            self._log_frame_stall_warning(
+                f"{self.name or self.cam_id}: video writer has failed ({self.writer_error}); frames are not being recorded."
+            )
+            return False
+        # kept as integer nanoseconds until the row is written
+        timestamp_ns = self.session_clock.elapsed_ns() if self.session_clock is not None else 0
+        try:
+            self.write_queue.put_nowait((frame, timestamp_ns, self.last_arduino_line))
+        except queue.Full:
+            self.dropped_frame_count += 1
+            self._log_frame_stall_warning(
+                f"{self.name or self.cam_id}: video writer is falling behind; {self.dropped_frame_count} frames dropped so far."
+            )
+            return False
         stall_threshold = max(1.0, 3.0 * self.record_interval_s)
         if frame_time is not None:
             frame_age = now - frame_time
@@ -650,8 +1296,7 @@ class CameraSetup:
             if delta > 0:
                 self.last_write_fps = 1.0 / delta
         self.last_write_time = now
-        self.csv_writer.writerow([timestamp, self.last_arduino_line])
-        self.elapsed_time = int(timestamp)
+        self.elapsed_time = timestamp_ns // 1_000_000_000
         return True
 
     def update_fps_diagnostic(self, read_complete, ret):
@@ -670,17 +1315,23 @@ class CameraSetup:
         self.last_effective_fps = 1.0 / delta
 
     def parse_arduino_status(self, line):
-        parts = [part.strip() for part in line.split(";")]
-        if len(parts) != 3:
-            return None
-        brake_raw, wheel_pos, mode = parts
-        brake_text = "locked" if brake_raw == "0" else "unlocked" if brake_raw == "1" else brake_raw
-        return (brake_text, wheel_pos, normalize_lock_state(mode) or mode)
+        # an idle wheel repeats the same line, so the last result is reused
+        cached_line, cached_status = self.parsed_status_cache
+        if line == cached_line:
+            return cached_status
+        match = ARDUINO_STATUS_RE.match(line)
+        status = None
+        if match is not None:
+            brake_raw, wheel_pos, mode = match.groups()
+            status = (BRAKE_TEXT.get(brake_raw, brake_raw), wheel_pos, normalize_lock_state(mode) or mode)
+        self.parsed_status_cache = (line, status)
+        return status
 
     def sync_lock_state_from_status(self):
-        if self.lock_state_synced_from_hardware or self.lock_state_user_overridden or self.latest_status is None:
+        status = self.latest_status
+        if self.lock_state_synced_from_hardware or self.lock_state_user_overridden or status is None:
             return False
-        mode = normalize_lock_state(self.latest_status[2])
+        mode = normalize_lock_state(status[2])
         if mode is None:
             return False
         changed = self.lock_state != mode
@@ -733,12 +1384,16 @@ class App:
         self.auto_cycle_interval = 5
         self.record_fps = 10.0
         self.frame_interval_ms = int(1000.0 / self.record_fps)
-        self.acquire_sleep_s = 0.001
+        self.acquire_wait_s = 0.1
         self.acquisition_stop_event = threading.Event()
-        self.acquisition_thread = None
+        self.acquisition_threads = []
+        # opened on the first expID and kept for the session
+        self.exp_list_file = None
 
         self.status_dialog = None
         self.status_text = None
+        # lines logged off the main thread wait here for the status dialog
+        self.pending_status_lines = queue.SimpleQueue()
         self.create_status_dialog()
         self.log("Starting application", level="DEBUG")
         self.initialization_failed = False
@@ -764,12 +1419,25 @@ class App:
         self.root_dir = config['DEFAULT']['RootDirectory']
         self.remote_repo = config['DEFAULT'].get('RemoteRepository', r'\\ar-lab-nas1\\DataServer\\Remote_Repository')
         self.exp_list_dir = config['DEFAULT'].get('ExperimentListDirectory', r'\\ar-lab-nas1\\DataServer\\Remote_Repository\\habituation')
+        # OpenCV's transparent OpenCL path is opt-in; some drivers are slower
+        # than the CPU for small frames
+        self.use_opencl = parse_bool(config['DEFAULT'].get('UseOpenCL'), False) and cv2.ocl.haveOpenCL()
+        cv2.ocl.setUseOpenCL(self.use_opencl)
+        self.preview_width = None
+        try:
+            preview_width = parse_optional_float(config['DEFAULT'].get('PreviewWidth'))
+        except ValueError:
+            self.log(f"Invalid PreviewWidth value '{config['DEFAULT'].get('PreviewWidth')}'; ignoring", level="WARNING")
+            preview_width = None
+        if preview_width is not None and preview_width > 0:
+            self.preview_width = int(preview_width)
         self.log(f"Checking root directory: {self.root_dir}", level="DEBUG")
         if not os.path.exists(self.root_dir):
             self.log(f"Root directory '{self.root_dir}' not found. Creating it.", level="INFO")
             os.makedirs(self.root_dir)
 
         section_names = config.sections()
+        specs = []
         configured_camera_ids = []
         for section_name in section_names:
             if "CameraID" not in config[section_name]:
@@ -792,42 +1460,86 @@ class App:
                 cam_id = self.parse_camera_id(config[section_name]["CameraID"])
             com_port = config[section_name]["COMPort"]
             capture_settings = self.parse_capture_settings(config[section_name], section_name)
-            self.log(f"{section_name}: Checking camera {cam_id} and COM port {com_port}", level="DEBUG")
-
-            cap = self.open_capture(cam_id, capture_settings=capture_settings)
-            if not cap.isOpened():
-                self.log(f"{section_name}: Camera ID {cam_id} could not be opened. Skipping this setup.", level="ERROR")
-                cap.release()
-                continue
-            cap.release()
-
             flip_horizontal = parse_bool(config[section_name].get('FlipHorizontal', False))
             flip_vertical = parse_bool(config[section_name].get('FlipVertical', False))
-
-            setup_name = section_name
-            setup = CameraSetup(
-                cam_id,
-                com_port,
-                self.root_dir,
+            record_size = self.parse_record_size(config[section_name], section_name)
+            # NVENC is opt-in: on rigs without it every Start would first
+            # try a writer that cannot open
+            video_codec = parse_optional_text(config[section_name].get("VideoCodec")) or DEFAULT_VIDEO_CODEC
+            if video_codec.lower() == NVENC_VIDEO_CODEC:
+                video_codec = NVENC_VIDEO_CODEC
+            elif len(video_codec) != 4:
+                self.log(
+                    f"{section_name}: VideoCodec '{video_codec}' is not a four-character code; using {DEFAULT_VIDEO_CODEC}",
+                    level="WARNING"
+                )
+                video_codec = DEFAULT_VIDEO_CODEC
+            specs.append(SetupSpec(
+                section_name=section_name,
+                cam_id=cam_id,
+                com_port=com_port,
+                capture_settings=capture_settings,
                 flip_horizontal=flip_horizontal,
                 flip_vertical=flip_vertical,
-                logger=self.log,
-                name=setup_name,
-                config_section=section_name,
-                capture_settings=capture_settings,
-                capture_factory=lambda camera_id, settings=capture_settings: self.open_capture(
-                    camera_id,
-                    capture_settings=settings
-                )
-            )
-            self.setups.append(setup)
-            self.log(f"{section_name} initialized.", level="DEBUG")
+                record_size=record_size,
+                video_codec=video_codec,
+            ))
+
+        if any(spec.video_codec == NVENC_VIDEO_CODEC for spec in specs):
+            # the ffmpeg NVENC test encode can take seconds, so it runs while
+            # the cameras open instead of when Record is first pressed
+            threading.Thread(target=probe_ffmpeg_nvenc, daemon=True).start()
+
+        # opening a camera and its serial port mostly waits on the drivers,
+        # so all setups are opened at once; setups keep the config order
+        if specs:
+            with ThreadPoolExecutor(max_workers=len(specs)) as executor:
+                futures = [executor.submit(self.create_setup, spec) for spec in specs]
+                pending = set(futures)
+                while pending:
+                    # keep the status dialog painting while the opens run
+                    _, pending = wait(pending, timeout=0.1)
+                    self.flush_status_lines()
+            self.setups.extend(setup for setup in (future.result() for future in futures) if setup is not None)
 
         if not self.setups:
             self.log("No valid camera setups found. Exiting.", level="ERROR")
             self.initialization_failed = True
             self.root.quit()
 
+    def create_setup(self, spec):
+        self.log(f"{spec.section_name}: Checking camera {spec.cam_id} and COM port {spec.com_port}", level="DEBUG")
+        cap = self.open_capture(spec.cam_id, capture_settings=spec.capture_settings)
+        if not cap.isOpened():
+            self.log(
+                f"{spec.section_name}: Camera ID {spec.cam_id} could not be opened. Skipping this setup.",
+                level="ERROR"
+            )
+            cap.release()
+            return None
+
+        setup = CameraSetup(
+            spec.cam_id,
+            spec.com_port,
+            self.root_dir,
+            flip_horizontal=spec.flip_horizontal,
+            flip_vertical=spec.flip_vertical,
+            record_size=spec.record_size,
+            video_codec=spec.video_codec,
+            use_opencl=self.use_opencl,
+            logger=self.log,
+            name=spec.section_name,
+            config_section=spec.section_name,
+            capture_settings=spec.capture_settings,
+            capture_factory=lambda camera_id, settings=spec.capture_settings: self.open_capture(
+                camera_id,
+                capture_settings=settings
+            ),
+            capture=cap,
+        )
+        self.log(f"{spec.section_name} initialized.", level="DEBUG")
+        return setup
+
     def parse_capture_settings(self, section, section_name):
         settings = {}
         settings["UserSet"] = parse_optional_text(section.get("UserSet"))
@@ -842,6 +1554,20 @@ class App:
                 settings[option] = None
         return settings
 
+    def parse_record_size(self, section, section_name):
+        size = []
+        for option in ("RecordWidth", "RecordHeight"):
+            try:
+                value = parse_optional_float(section.get(option))
+            except ValueError:
+                self.log(
+                    f"{section_name}: invalid {option} value '{section.get(option)}'; ignoring",
+                    level="WARNING"
+                )
+                value = None
+            size.append(int(value) if value is not None and value > 0 else None)
+        return tuple(size)
+
     def initialize_imaging_source(self):
         ic4.Library.init()
         self.ic4_device_infos = list(ic4.DeviceEnum.devices())
@@ -885,26 +1611,35 @@ class App:
 
     def start_acquisition_loop(self):
         self.acquisition_stop_event.clear()
-        self.acquisition_thread = threading.Thread(target=self.acquisition_loop, daemon=True)
-        self.acquisition_thread.start()
+        # one thread per setup so a slow or stalled camera cannot hold up
+        # the others
+        self.acquisition_threads = []
+        for setup in self.setups:
+            thread = threading.Thread(target=self.acquisition_loop, args=(setup,), daemon=True)
+            thread.start()
+            self.acquisition_threads.append(thread)
 
     def stop_acquisition_loop(self):
         self.acquisition_stop_event.set()
-        if self.acquisition_thread is not None and self.acquisition_thread.is_alive():
-            self.acquisition_thread.join(timeout=2.0)
-        self.acquisition_thread = None
+        for thread in self.acquisition_threads:
+            if thread.is_alive():
+                thread.join(timeout=2.0)
+        self.acquisition_threads = []
 
-    def acquisition_loop(self):
+    def acquisition_loop(self, setup):
         while not self.acquisition_stop_event.is_set():
-            did_work = False
-            for setup in self.setups:
-                if self.acquisition_stop_event.is_set():
-                    break
-                self.ensure_setup_capture(setup)
-                if setup.poll_capture():
-                    did_work = True
-            if not did_work:
-                self.acquisition_stop_event.wait(self.acquire_sleep_s)
+            self.ensure_setup_capture(setup)
+            if not setup.poll_capture(decode=self.setup_needs_frames(setup)):
+                # sleep until the camera delivers the next frame; the timeout
+                # bounds how long shutdown can take
+                setup.wait_for_frame(self.acquire_wait_s, self.acquisition_stop_event)
+
+    def setup_needs_frames(self, setup):
+        # only the displayed setup, recording setups and an open camera
+        # viewer need decoded frames; the others just keep their buffers drained
+        if setup.recording or getattr(self, "camera_viewer_items", None):
+            return True
+        return bool(self.setups) and setup is self.setups[self.current_setup]
 
     def create_status_dialog(self):
         self.status_dialog = tk.Toplevel(self.root)
@@ -940,8 +1675,21 @@ class App:
         else:
             line = f"[{level}] {message}"
         print(line)
+        if threading.current_thread() is not threading.main_thread():
+            # Tk may only be touched from the main thread
+            if self.status_dialog is not None:
+                self.pending_status_lines.put(line)
+            return
+        self.pending_status_lines.put(line)
+        self.flush_status_lines()
+
+    def flush_status_lines(self):
+        lines = []
+        while not self.pending_status_lines.empty():
+            lines.append(self.pending_status_lines.get_nowait())
         if self.status_text is not None and self.status_dialog is not None:
-            self.status_text.insert("end", line)
+            for line in lines:
+                self.status_text.insert("end", line)
             self.status_text.see("end")
             self.status_dialog.update()
 
@@ -968,11 +1716,21 @@ class App:
                     return 0.0
                 def set(self, _prop_id, _value):
                     return False
+                def grab(self):
+                    return False
+                def retrieve(self):
+                    return False, None
                 def read(self):
                     return False, None
                 def release(self):
                     return None
             cap = _ClosedCapture()
+        # keep at most one frame queued so reads never return stale data;
+        # not every backend supports the property
+        try:
+            cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+        except Exception:
+            pass
         if log_success:
             if cap.isOpened():
                 serial = getattr(getattr(cap, "device_info", None), "serial", "unknown")
@@ -1085,6 +1843,12 @@ class App:
 
         self.video_panel = ttk.Label(media_frame)
         self.video_panel.grid(row=0, column=1, sticky="")
+        # frames are shrunk to fit this box before any colour work
+        screen_width = max(1, self.root.winfo_screenwidth())
+        preview_width = max(1, int(screen_width * 0.75))
+        if self.preview_width is not None:
+            preview_width = min(preview_width, self.preview_width)
+        self.preview_max_size = (preview_width, max(1, int(screen_height * 0.5)))
 
         self.fps_label = ttk.Label(self.root, text="FPS: --", font=self.small_font)
         self.fps_label.pack()
@@ -1170,6 +1934,12 @@ class App:
         self.update_camera_settings_label()
         self.last_display_time = None
         self.last_display_fps = None
+        self.next_display_deadline = None
+        # the frame last painted in the main preview; ticks that find the
+        # same frame object skip the repaint
+        self.last_preview_frame = None
+        self.last_timer_state = None
+        self.last_fps_text = None
 
     def update_video(self):
         setup = self.setups[self.current_setup]
@@ -1181,37 +1951,84 @@ class App:
         self.last_display_time = now
         frame = setup.get_latest_frame()
         if self.debug_var.get():
+            serial_age = now - setup.last_serial_time if setup.last_serial_time is not None else float('nan')
+            overwritten = getattr(setup.cap, "overwritten_frame_count", None)
             self.debug_log(
                 f"{setup.name}: frame_read={setup.last_frame_ms:.1f}ms, "
-                f"serial_drain={setup.last_serial_ms:.1f}ms, "
+                f"serial_age={serial_age:.2f}s, "
                 f"effective_fps={setup.last_effective_fps if setup.last_effective_fps is not None else float('nan'):.2f}, "
+                f"overwritten={overwritten if overwritten is not None else 'n/a'}, "
                 f"frame_ok={frame is not None}"
             )
-        if frame is not None:
-            rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            img = Image.fromarray(rgb)
-            imgtk = ImageTk.PhotoImage(image=img)
-            self.video_panel.imgtk = imgtk
-            self.video_panel.config(image=imgtk)
-        if setup.recording and setup.last_arduino_line and setup.last_arduino_line != setup.last_logged_arduino_line:
-            self.debug_log(f"{setup.name}: {setup.last_arduino_line}")
-            setup.last_logged_arduino_line = setup.last_arduino_line
+        if frame is not None and frame is not self.last_preview_frame:
+            self.show_preview(self.video_panel, frame, self.preview_max_size, setup.flip_code)
+            self.last_preview_frame = frame
+        arduino_line = setup.last_arduino_line
+        if setup.recording and arduino_line and arduino_line != setup.last_logged_arduino_line:
+            self.debug_log(f"{setup.name}: {arduino_line}")
+            setup.last_logged_arduino_line = arduino_line
 
         self.update_lock_state_button()
 
         elapsed = 0
         if setup.recording and setup.session_clock is not None:
-            elapsed = int(setup.session_clock.elapsed())
+            elapsed = setup.session_clock.elapsed_ns() // 1_000_000_000
             setup.elapsed_time = elapsed
-        remaining = max(0, (setup.session_duration * 60) - elapsed)
+        # the label depends only on these and changes at most once a second,
+        # so most ticks skip the formatting and the reconfigure (and the
+        # relayout it triggers)
+        timer_state = (setup.recording, elapsed, setup.session_duration)
+        if timer_state != self.last_timer_state:
+            self.update_timer_label(*timer_state)
+            self.last_timer_state = timer_state
+        self.update_setup_label()
+        fps_parts = []
+        if setup.last_effective_fps is not None:
+            fps_parts.append(f"Acquire FPS: {setup.last_effective_fps:.1f}")
+        if setup.last_write_fps is not None:
+            fps_parts.append(f"Write FPS: {setup.last_write_fps:.1f}")
+        if setup.recording and setup.writer_error is not None:
+            fps_parts.append("Writer FAILED")
+        if setup.recording and setup.dropped_frame_count:
+            fps_parts.append(f"Dropped: {setup.dropped_frame_count}")
+        overwritten = getattr(setup.cap, "overwritten_frame_count", None)
+        if setup.recording and overwritten:
+            overwritten -= setup.overwritten_frame_baseline
+            if overwritten > 0:
+                fps_parts.append(f"Overwritten: {overwritten}")
+        fps_text = " | ".join(fps_parts) if fps_parts else "FPS: --"
+        if fps_text != self.last_fps_text:
+            self.fps_label.config(text=fps_text)
+            self.last_fps_text = fps_text
+
+        if self.running:
+            # schedule against a fixed deadline so the time spent in this
+            # tick (and Tk's timer slack) does not stretch the interval
+            interval_s = self.frame_interval_ms / 1000.0
+            if setup.last_effective_fps:
+                # no point waking faster than the camera delivers frames;
+                # the cap keeps the timer label responsive for slow cameras
+                interval_s = max(interval_s, min(1.0 / setup.last_effective_fps, MAX_DISPLAY_INTERVAL_S))
+            finished = time.monotonic()
+            if self.next_display_deadline is None:
+                self.next_display_deadline = now
+            self.next_display_deadline += interval_s
+            if self.next_display_deadline <= finished:
+                # fell behind by more than a tick; resync instead of bursting
+                self.next_display_deadline = finished + interval_s
+            delay_ms = max(1, int((self.next_display_deadline - finished) * 1000.0))
+            self.root.after(delay_ms, self.update_video)
+
+    def update_timer_label(self, recording, elapsed, session_duration):
+        remaining = max(0, (session_duration * 60) - elapsed)
         elapsed_str = f"{elapsed // 60}:{elapsed % 60:02d}"
         remaining_str = f"{remaining // 60}:{remaining % 60:02d}"
 
-        if not setup.recording:
+        if not recording:
             color = "black"
-        elif remaining == 0 and setup.session_duration > 0:
+        elif remaining == 0 and session_duration > 0:
             color = "red"
-        elif remaining < 5 * 60 and setup.session_duration > 0:
+        elif remaining < 5 * 60 and session_duration > 0:
             color = "orange"
         else:
             color = "green"
@@ -1220,16 +2037,30 @@ class App:
             text=f"Elapsed: {elapsed_str} | Remaining: {remaining_str}",
             foreground=color
         )
-        self.update_setup_label()
-        fps_parts = []
-        if setup.last_effective_fps is not None:
-            fps_parts.append(f"Acquire FPS: {setup.last_effective_fps:.1f}")
-        if setup.last_write_fps is not None:
-            fps_parts.append(f"Write FPS: {setup.last_write_fps:.1f}")
-        self.fps_label.config(text=" | ".join(fps_parts) if fps_parts else "FPS: --")
 
-        if self.running:
-            self.root.after(self.frame_interval_ms, self.update_video)
+    def show_preview(self, panel, frame, max_size, flip_code=None):
+        height, width = frame.shape[:2]
+        scale = min(1.0, max_size[0] / width, max_size[1] / height)
+        size = (max(1, int(width * scale)), max(1, int(height * scale)))
+        if scale < 1.0:
+            # downscale into a buffer kept on the panel rather than a new
+            # array every tick
+            buffer = getattr(panel, "preview_buffer", None)
+            if buffer is None or buffer.shape != (size[1], size[0]) + frame.shape[2:]:
+                buffer = None
+            frame = cv2.resize(frame, size, dst=buffer, interpolation=cv2.INTER_AREA)
+            panel.preview_buffer = frame
+        if flip_code is not None:
+            frame = cv2.flip(frame, flip_code)
+        # PIL's raw decoder swaps BGR->RGB while unpacking the buffer
+        img = Image.frombuffer("RGB", size, frame, "raw", "BGR", 0, 1)
+        imgtk = getattr(panel, "imgtk", None)
+        if imgtk is None or (imgtk.width(), imgtk.height()) != size:
+            # one PhotoImage per panel, repainted in place while the size holds
+            imgtk = ImageTk.PhotoImage("RGB", size)
+            panel.imgtk = imgtk
+            panel.config(image=imgtk)
+        imgtk.paste(img)
 
     def auto_cycle_loop(self):
         if self.auto_cycle:
@@ -1407,9 +2238,13 @@ class App:
             remote_exp_dir = None
         else:
             try:
-                append_exp_list(self.exp_list_dir, exp_id)
+                if self.exp_list_file is None:
+                    self.exp_list_file = open_exp_list(self.exp_list_dir)
+                append_exp_list(self.exp_list_file, exp_id)
             except Exception as exc:
                 self.log(f"Failed to append experiment list for '{exp_id}': {exc}", level="WARNING")
+                # reopen next time in case the share dropped the handle
+                self.close_exp_list()
         local_exp_dir = os.path.join(self.root_dir, mouse_id or "unknown", exp_id)
         os.makedirs(local_exp_dir, exist_ok=True)
         self.log(f"Using expID '{exp_id}'. Local path: {local_exp_dir}", level="INFO")
@@ -1518,8 +2353,9 @@ class App:
         exp_suffix = f": {setup.exp_id}" if setup.exp_id else ""
         label_name = setup.name or f"Setup{self.current_setup}"
         status_line = ""
-        if setup.latest_status:
-            lock_text, wheel_pos, mode = setup.latest_status
+        status = setup.latest_status
+        if status:
+            lock_text, wheel_pos, mode = status
             status_line = f"{lock_text}, {wheel_pos}, mode: {mode}"
         self.setup_label.config(text=f"{label_name}{exp_suffix}")
         self.arduino_status_label.config(text=status_line)
@@ -1608,6 +2444,7 @@ class App:
             return
 
         self.camera_viewer_items = []
+        self.camera_viewer_index = 0
         columns = 2
         for idx, setup in enumerate(self.setups):
             frame = ttk.Frame(self.camera_viewer)
@@ -1621,7 +2458,7 @@ class App:
             ttk.Label(frame, text=label_text, justify="center", wraplength=480).pack()
             panel = ttk.Label(frame)
             panel.pack(fill="both", expand=True)
-            self.camera_viewer_items.append({"setup": setup, "panel": panel})
+            self.camera_viewer_items.append({"setup": setup, "panel": panel, "frame": None})
 
         self.camera_viewer.protocol("WM_DELETE_WINDOW", self.close_camera_viewer)
         self.update_camera_viewer()
@@ -1631,17 +2468,16 @@ class App:
             return
         if not self.camera_viewer.winfo_exists():
             return
-        for item in self.camera_viewer_items:
-            setup = item["setup"]
-            panel = item["panel"]
-            frame = setup.get_latest_frame()
-            if frame is not None:
-                rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-                img = Image.fromarray(rgb)
-                imgtk = ImageTk.PhotoImage(image=img)
-                panel.imgtk = imgtk
-                panel.config(image=imgtk)
-        self.camera_viewer.after(100, self.update_camera_viewer)
+        # one panel is repainted per tick, round-robin, so each tick costs a
+        # single frame conversion however many cameras are shown
+        if self.camera_viewer_items:
+            item = self.camera_viewer_items[self.camera_viewer_index % len(self.camera_viewer_items)]
+            self.camera_viewer_index += 1
+            frame = item["setup"].get_latest_frame()
+            if frame is not None and frame is not item["frame"]:
+                self.show_preview(item["panel"], frame, (480, 320), item["setup"].flip_code)
+                item["frame"] = frame
+        self.camera_viewer.after(33, self.update_camera_viewer)
 
     def close_camera_viewer(self):
         if hasattr(self, "camera_viewer_items"):
@@ -1669,12 +2505,32 @@ class App:
         self._update_camera_settings_toggle_button()
         self.update_camera_settings_label()
 
+    def close_exp_list(self):
+        exp_list_file = self.exp_list_file
+        self.exp_list_file = None
+        if exp_list_file is None:
+            return
+        try:
+            exp_list_file.flush()
+            os.fsync(exp_list_file.fileno())
+        except OSError:
+            pass
+        try:
+            exp_list_file.close()
+        except OSError:
+            pass
+
     def on_closing(self):
         self.running = False
         self.stop_acquisition_loop()
         for setup in self.setups:
             setup.stop_recording()
             setup.release_capture()
+            setup.stop_serial_reader()
+        for setup in self.setups:
+            # writer threads are daemons, so let them save before exiting
+            setup.wait_for_writer(WRITER_FINISH_TIMEOUT_S)
+        self.close_exp_list()
         self.ic4_device_infos = []
         ic4.Library.exit()
         self.root.destroy()